@@ -4,6 +4,10 @@ from database import db
 from routes.upload import upload_bp
 from routes.query import query_bp
 from routes.viewer import viewer_bp
+from routes.batch import batch_bp
+from routes.http_cache import compress_response
+from routes.profiling import profiling_bp
+from services.profiler import init_profiling, PROFILE_TOKEN
 
 app = Flask(__name__)
 CORS(app, supports_credentials=True)
@@ -12,10 +16,17 @@ app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///intelli_claim.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 db.init_app(app)
+app.after_request(compress_response)
 
 app.register_blueprint(upload_bp, url_prefix="/api")
 app.register_blueprint(query_bp, url_prefix="/api")
 app.register_blueprint(viewer_bp, url_prefix="/api")
+app.register_blueprint(batch_bp, url_prefix="/api")
+
+# 🔬 Opt-in request profiling (PROFILE_TOKEN / PROFILE_SAMPLE_RATE); no-op when unset.
+#    Profiles are only served over HTTP when a token is configured.
+if init_profiling(app) and PROFILE_TOKEN:
+    app.register_blueprint(profiling_bp, url_prefix="/api")
 
 @app.route('/')
 def index():
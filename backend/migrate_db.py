@@ -0,0 +1,76 @@
+# migrate_db.py
+# Brings an intelli_claim.db created before policy versioning up to date:
+# adds the new document/clause columns and replaces the global
+# UNIQUE(clause_id) with UNIQUE(document_id, clause_id).
+# db.create_all() never alters existing tables, so run this once after upgrading.
+# (PostgreSQL: use scripts/migrate-policy-versions.sql instead.)
+from database import db
+from models.document_model import Document
+from models.clause_model import Clause
+from models.page_model import DocumentPage
+from models.batch_job_model import BatchJob
+from flask import Flask
+from sqlalchemy import inspect, text
+
+app = Flask(__name__)
+app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///intelli_claim.db'
+app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+db.init_app(app)
+
+NEW_COLUMNS = {
+    "documents": [
+        ("content_hash", "VARCHAR(64)"),
+        ("parent_id", "INTEGER REFERENCES documents(id)"),
+        ("version", "INTEGER DEFAULT 1"),
+        ("email_id", "INTEGER REFERENCES documents(id)"),
+    ],
+    "clauses": [
+        ("content_hash", "VARCHAR(64)"),
+    ],
+}
+
+CLAUSE_COLUMNS = "id, clause_id, document_id, title, content, category, page_number, relevance_keywords, content_hash, created_at"
+
+
+def add_missing_columns(inspector):
+    for table, columns in NEW_COLUMNS.items():
+        existing = {c["name"] for c in inspector.get_columns(table)}
+        for name, ddl in columns:
+            if name not in existing:
+                db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+                print(f"✅ Added {table}.{name}")
+
+
+def has_global_clause_unique(inspector):
+    constraints = inspector.get_unique_constraints("clauses")
+    indexes = [i for i in inspector.get_indexes("clauses") if i.get("unique")]
+    return any(c["column_names"] == ["clause_id"] for c in constraints + indexes)
+
+
+# SQLite can't drop a constraint, so the clauses table is rebuilt
+def rebuild_clauses():
+    db.session.execute(text("ALTER TABLE clauses RENAME TO clauses_old"))
+    for index in inspect(db.session.connection()).get_indexes("clauses_old"):
+        db.session.execute(text(f"DROP INDEX IF EXISTS {index['name']}"))
+    Clause.__table__.create(db.session.connection())
+    db.session.execute(text(f"INSERT INTO clauses ({CLAUSE_COLUMNS}) SELECT {CLAUSE_COLUMNS} FROM clauses_old"))
+    db.session.execute(text("DROP TABLE clauses_old"))
+    print("✅ Clause ids are now unique per document")
+
+
+with app.app_context():
+    try:
+        inspector = inspect(db.engine)
+        if not inspector.has_table("documents"):
+            print("⚠️ No existing tables; app.py will create the current schema.")
+        else:
+            add_missing_columns(inspector)
+            db.session.execute(text("UPDATE documents SET version = 1 WHERE version IS NULL"))
+            if has_global_clause_unique(inspect(db.session.connection())):
+                rebuild_clauses()
+            db.session.commit()
+            db.create_all()  # document_pages, batch_jobs, indexes
+            print("✅ Database migrated.")
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Migration failed: {e}")
@@ -0,0 +1,64 @@
+from datetime import datetime
+from database import db
+
+class BatchJob(db.Model):
+    __tablename__ = 'batch_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255))
+    status = db.Column(db.String(20), default='queued')  # queued / running / completed / failed
+    concurrency = db.Column(db.Integer, default=4)
+    total = db.Column(db.Integer, default=0)
+    completed = db.Column(db.Integer, default=0)
+    failed = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text)
+    heartbeat_at = db.Column(db.DateTime)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<BatchJob {self.id} - {self.status}>"
+
+# ✅ Insert batch job utility
+def insert_batch_job(name, total, concurrency):
+    job = BatchJob(
+        name=name,
+        status='queued',
+        total=total,
+        concurrency=concurrency,
+        heartbeat_at=datetime.utcnow(),
+        created_at=datetime.utcnow(),
+        updated_at=datetime.utcnow()
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+# ✅ Serialize batch job to JSON
+def serialize_batch_job(job, stale_after_seconds=None):
+    status = job.status
+    if (
+        status in ('queued', 'running')
+        and stale_after_seconds is not None
+        and job.heartbeat_at
+        and (datetime.utcnow() - job.heartbeat_at).total_seconds() > stale_after_seconds
+    ):
+        status = 'stalled'  # runner died without finishing; can be resumed
+
+    done = (job.completed or 0) + (job.failed or 0)
+    return {
+        "id": job.id,
+        "name": job.name,
+        "status": status,
+        "concurrency": job.concurrency,
+        "total": job.total,
+        "completed": job.completed,
+        "failed": job.failed,
+        "progress": round(done / job.total, 4) if job.total else 0.0,
+        "error": job.error,
+        "startedAt": job.started_at.isoformat() if job.started_at else None,
+        "finishedAt": job.finished_at.isoformat() if job.finished_at else None,
+        "createdAt": job.created_at.isoformat() if job.created_at else None,
+    }
@@ -6,15 +6,20 @@ class Clause(db.Model):
     __tablename__ = 'clauses'
 
     id = db.Column(db.Integer, primary_key=True)
-    clause_id = db.Column(db.String(20), unique=True, nullable=False)
+    clause_id = db.Column(db.String(20), nullable=False)  # unique per document, e.g. "C042"
     document_id = db.Column(db.Integer, db.ForeignKey('documents.id'), nullable=True)
     title = db.Column(db.String(255))
     content = db.Column(db.Text, nullable=False)
     category = db.Column(db.String(100))
     page_number = db.Column(db.Integer)
     relevance_keywords = db.Column(JSON, nullable=True)
+    content_hash = db.Column(db.String(64), index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.UniqueConstraint('document_id', 'clause_id', name='uq_clauses_document_clause'),
+    )
+
     def __repr__(self):
         return f"<Clause {self.clause_id}>"
 
@@ -22,13 +27,13 @@ class Clause(db.Model):
 import uuid
 from sqlalchemy.exc import IntegrityError
 
-def insert_clause(clause_id, document_id, content, title=None, category=None, page_number=None, keywords=None):
+def insert_clause(clause_id, document_id, content, title=None, category=None, page_number=None, keywords=None, content_hash=None):
     from models.clause_model import Clause
 
-    # Check if clause_id already exists
-    existing = Clause.query.filter_by(clause_id=clause_id).first()
+    # Check if clause_id already exists for this document
+    existing = Clause.query.filter_by(document_id=document_id, clause_id=clause_id).first()
     if existing:
-        print(f"⚠️ Clause ID '{clause_id}' already exists. Skipping insert.")
+        print(f"⚠️ Clause ID '{clause_id}' already exists for document {document_id}. Skipping insert.")
         return None  # You can also raise a custom error or log instead
 
     try:
@@ -40,6 +45,7 @@ def insert_clause(clause_id, document_id, content, title=None, category=None, pa
             category=category,
             page_number=page_number,
             relevance_keywords=keywords or [],
+            content_hash=content_hash,
             created_at=datetime.utcnow()
         )
         db.session.add(clause)
@@ -12,6 +12,10 @@ class Document(db.Model):
     status = db.Column(db.String(50), default='processed')
     extracted_text = db.Column(db.Text)
     doc_metadata = db.Column(db.JSON)
+    content_hash = db.Column(db.String(64), index=True)
+    parent_id = db.Column(db.Integer, db.ForeignKey('documents.id'), nullable=True)  # previous version
+    version = db.Column(db.Integer, default=1)
+    email_id = db.Column(db.Integer, db.ForeignKey('documents.id'), nullable=True)  # set on email attachments
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -19,13 +23,17 @@ class Document(db.Model):
         return f"<Document {self.name}>"
 
 # ✅ Insert a new document
-def insert_document(name, file_type, size, extracted_text, metadata=None):
+def insert_document(name, file_type, size, extracted_text, metadata=None, parent_id=None, version=1, content_hash=None, email_id=None):
     new_doc = Document(
         name=name,
         type=file_type,
         size=size,
         extracted_text=extracted_text,
         doc_metadata=metadata or {},
+        content_hash=content_hash,
+        parent_id=parent_id,
+        version=version,
+        email_id=email_id,
         uploaded_at=datetime.utcnow(),
         created_at=datetime.utcnow(),
         updated_at=datetime.utcnow()
@@ -38,17 +46,29 @@ def insert_document(name, file_type, size, extracted_text, metadata=None):
 def get_document_by_id(doc_id):
     return Document.query.get(doc_id)
 
+# Stored for internal use (page splitting, query routing); one int per page
+# in pageOffsets makes these too large to send with every listing
+INTERNAL_METADATA_KEYS = {"pageOffsets", "profile"}
+
+# ✅ Metadata safe to return to clients
+def public_metadata(metadata):
+    return {k: v for k, v in (metadata or {}).items() if k not in INTERNAL_METADATA_KEYS}
+
 # ✅ Serialize document to JSON
-def serialize_document(doc):
-    return {
+def serialize_document(doc, include_text=False):
+    out = {
         "id": doc.id,
         "name": doc.name,
         "type": doc.type,
         "size": doc.size,
         "uploadedAt": doc.uploaded_at.isoformat() if doc.uploaded_at else "",
         "status": doc.status,
-        "extractedText": doc.extracted_text,
         "analysis": f"Structured analysis for: {doc.name}",  # Dummy text for now
+        "version": doc.version or 1,
+        "previousVersionId": doc.parent_id,
+        "clauseDiff": doc.doc_metadata.get("clauseDiff"),
+        "emailId": doc.email_id,
+        "attachments": doc.doc_metadata.get("attachments", []),
         "metadata": {
             "pages": doc.doc_metadata.get("pages", 3),
             "language": doc.doc_metadata.get("language", "en"),
@@ -57,3 +77,7 @@ def serialize_document(doc):
             "processingTime": doc.doc_metadata.get("processingTime", "1.2s"),
         }
     }
+    # Full text is large; the viewer fetches it from /documents/<id> when needed
+    if include_text:
+        out["extractedText"] = doc.extracted_text
+    return out
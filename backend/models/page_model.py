@@ -0,0 +1,56 @@
+from datetime import datetime
+from database import db
+
+class DocumentPage(db.Model):
+    __tablename__ = 'document_pages'
+
+    id = db.Column(db.Integer, primary_key=True)
+    document_id = db.Column(db.Integer, db.ForeignKey('documents.id'), nullable=False, index=True)
+    page_number = db.Column(db.Integer, nullable=False)  # 1-based
+    content = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('document_id', 'page_number', name='uq_document_pages_document_page'),
+    )
+
+    def __repr__(self):
+        return f"<DocumentPage {self.document_id}:{self.page_number}>"
+
+# ✅ Insert all pages of a document in one commit
+def insert_pages(document_id, pages):
+    db.session.add_all([
+        DocumentPage(
+            document_id=document_id,
+            page_number=number,
+            content=content,
+            created_at=datetime.utcnow()
+        )
+        for number, content in enumerate(pages, start=1)
+    ])
+    db.session.commit()
+    return len(pages)
+
+# ✅ Fetch an inclusive page range
+def get_page_range(document_id, start, end):
+    return (
+        DocumentPage.query
+        .filter(
+            DocumentPage.document_id == document_id,
+            DocumentPage.page_number >= start,
+            DocumentPage.page_number <= end,
+        )
+        .order_by(DocumentPage.page_number)
+        .all()
+    )
+
+# ✅ Number of stored pages for a document
+def count_pages(document_id):
+    return DocumentPage.query.filter_by(document_id=document_id).count()
+
+# ✅ Serialize page to JSON
+def serialize_page(page):
+    return {
+        "page": page.page_number,
+        "text": page.content or "",
+    }
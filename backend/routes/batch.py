@@ -0,0 +1,117 @@
+import os
+import time
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+
+from database import db
+from models.batch_job_model import BatchJob, insert_batch_job, serialize_batch_job
+from services.batch_runner import (
+    STALE_AFTER_SECONDS,
+    is_running_here,
+    max_concurrency,
+    results_path,
+    start_job,
+    store_input,
+)
+
+batch_bp = Blueprint("batch", __name__)
+
+
+def _get_job_or_404(job_id):
+    job = BatchJob.query.get(job_id)
+    if not job:
+        return None, (jsonify({"error": "Batch job not found"}), 404)
+    return job, None
+
+
+# ───────────────────────────────
+# 📦 Create a batch job from a JSONL file of claim queries
+#    one line per claim: {"query": "...", "document_id": 3 (optional)}
+@batch_bp.route("/batch/jobs", methods=["POST"])
+def create_batch_job():
+    if "file" not in request.files:
+        return jsonify({"error": "No file part in the request"}), 400
+
+    file = request.files["file"]
+    if not file.filename.lower().endswith((".jsonl", ".ndjson")):
+        return jsonify({"error": "Expected a .jsonl file"}), 400
+
+    try:
+        concurrency = int(request.form.get("concurrency", max_concurrency()))
+    except ValueError:
+        return jsonify({"error": "concurrency must be an integer"}), 400
+    concurrency = max(1, min(concurrency, max_concurrency()))
+
+    job_id = insert_batch_job(name=file.filename, total=0, concurrency=concurrency)
+    job = BatchJob.query.get(job_id)
+    job.total = store_input(job_id, file.stream)
+    db.session.commit()
+
+    start_job(current_app._get_current_object(), job_id)
+    return jsonify(serialize_batch_job(job)), 202
+
+
+# ───────────────────────────────
+# 📊 Job progress
+@batch_bp.route("/batch/jobs/<int:job_id>", methods=["GET"])
+def get_batch_job(job_id):
+    job, error = _get_job_or_404(job_id)
+    if error:
+        return error
+    return jsonify(serialize_batch_job(job, STALE_AFTER_SECONDS)), 200
+
+
+# ───────────────────────────────
+# 🔁 Resume a job that crashed or stalled; finished lines are skipped
+@batch_bp.route("/batch/jobs/<int:job_id>/resume", methods=["POST"])
+def resume_batch_job(job_id):
+    job, error = _get_job_or_404(job_id)
+    if error:
+        return error
+
+    status = serialize_batch_job(job, STALE_AFTER_SECONDS)["status"]
+    if status == "completed":
+        return jsonify({"error": "Batch job already completed"}), 409
+    if status == "running" or is_running_here(job_id):
+        return jsonify({"error": "Batch job is still running"}), 409
+
+    start_job(current_app._get_current_object(), job_id)
+    return jsonify(serialize_batch_job(job)), 202
+
+
+# ───────────────────────────────
+# 📤 Stream results as JSONL in completion order (each tagged with "line").
+#    Follows a running job until it finishes unless ?follow=false.
+@batch_bp.route("/batch/jobs/<int:job_id>/results", methods=["GET"])
+def stream_batch_results(job_id):
+    job, error = _get_job_or_404(job_id)
+    if error:
+        return error
+
+    follow = request.args.get("follow", "true").lower() != "false"
+    path = results_path(job_id)
+
+    def generate():
+        offset = 0
+        finished = False
+        while True:
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    chunk = f.read()
+                # Only emit complete lines; a partial line is picked up next poll
+                end = chunk.rfind(b"\n") + 1
+                if end:
+                    offset += end
+                    yield chunk[:end]
+
+            if finished or not follow:
+                return
+            db.session.expire_all()
+            status = serialize_batch_job(BatchJob.query.get(job_id), STALE_AFTER_SECONDS)["status"]
+            # Stop after one more read so lines written just before finishing aren't lost
+            finished = status not in ("queued", "running") and not is_running_here(job_id)
+            if not finished:
+                time.sleep(0.5)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
@@ -2,18 +2,30 @@ import fitz  # PyMuPDF for PDFs
 import docx2txt
 import extract_msg
 import email
+import base64
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from email import policy
 from io import BytesIO
 
+# Formats an email attachment may be parsed as (no nested emails)
+ATTACHMENT_EXTENSIONS = {"pdf", "docx"}
+
 # 📄 PDF: Read text and metadata
 def extract_text_from_pdf(file):
     doc = fitz.open(stream=file.read(), filetype="pdf")
     text = ""
+    page_offsets = []  # where each page starts in `text`
     for page in doc:
+        page_offsets.append(len(text))
         text += page.get_text()
 
     metadata = {
         "pages": len(doc),
+        "pageOffsets": page_offsets,
         "confidence": 0.97,
         "language": "en",
         "processingTime": f"{round(len(doc) * 0.3, 1)}s"
@@ -61,3 +73,246 @@ def extract_text_from_eml(file):
         return "\n".join(parts)
     except Exception as e:
         return f"Error reading EML file: {str(e)}"
+
+
+# ───────────────────────────────
+# 📎 Email attachments
+# ───────────────────────────────
+MAX_ATTACHMENT_BYTES = int(os.getenv("ATTACHMENT_MAX_BYTES", 10 * 1024 * 1024))  # 10 MB
+ATTACHMENT_TIMEOUT = float(os.getenv("ATTACHMENT_TIMEOUT", "30"))                # seconds per attachment
+ATTACHMENT_DEADLINE = float(os.getenv("ATTACHMENT_DEADLINE", "60"))              # seconds per email, queued time included
+ATTACHMENT_WORKERS = int(os.getenv("ATTACHMENT_WORKERS", "4"))
+SPOOL_CHUNK = 1024 * 1024
+
+# Long-lived pool: an attachment that overruns its time limit is abandoned
+# without blocking the request on its worker thread. Abandoned parses still
+# hold their thread, so once every worker is stuck the pool is replaced.
+_pool_lock = threading.Lock()
+_attachment_pool = ThreadPoolExecutor(max_workers=ATTACHMENT_WORKERS, thread_name_prefix="attachment")
+_stuck = set()
+
+
+def _get_pool():
+    global _attachment_pool
+    with _pool_lock:
+        if len(_stuck) >= ATTACHMENT_WORKERS:
+            print(f"⚠️ {len(_stuck)} attachment parses stuck; starting a fresh worker pool")
+            _attachment_pool.shutdown(wait=False)
+            _attachment_pool = ThreadPoolExecutor(max_workers=ATTACHMENT_WORKERS, thread_name_prefix="attachment")
+            _stuck.clear()
+        return _attachment_pool
+
+
+def _abandon(future):
+    with _pool_lock:
+        _stuck.add(future)
+
+    def release(done):
+        with _pool_lock:
+            _stuck.discard(done)
+
+    future.add_done_callback(release)
+
+
+# 📑 Split extracted text back into pages using metadata["pageOffsets"]
+#    (formats without page boundaries come back as a single page)
+def split_pages(text, page_offsets=None):
+    text = text or ""
+    offsets = page_offsets or [0]
+    bounds = list(offsets[1:]) + [len(text)]
+    return [text[start:end] for start, end in zip(offsets, bounds)]
+
+
+# ✨ Pick the parser for a file type → (text, metadata)
+def extract_text_by_type(file, ext):
+    if ext == "pdf":
+        return extract_text_from_pdf(file)
+    if ext == "docx":
+        return extract_text_from_docx(file), {"source": "docx", "confidence": 0.95}
+    if ext == "msg":
+        return extract_text_from_msg(file), {"source": "email-msg", "confidence": 0.94}
+    if ext == "eml":
+        return extract_text_from_eml(file), {"source": "email-eml", "confidence": 0.94}
+    raise ValueError(f"Unsupported file format: {ext}")
+
+
+# ✅ Write an attachment to a temp file. `size` is checked before `chunks()`
+#    (an iterator of decoded bytes) is consumed, so oversized attachments are
+#    never decoded.
+def _spool_attachment(filename, size, chunks):
+    ext = filename.rsplit(".", 1)[1].lower() if "." in filename else ""
+    attachment = {"name": filename, "ext": ext, "size": size}
+
+    if ext not in ATTACHMENT_EXTENSIONS:
+        attachment["status"] = "unsupported"
+        return attachment
+    if not size:
+        attachment["status"] = "empty"
+        return attachment
+    if size > MAX_ATTACHMENT_BYTES:
+        attachment["status"] = "too_large"
+        return attachment
+
+    written = 0
+    tmp = tempfile.NamedTemporaryFile(suffix=f".{ext}", delete=False)
+    try:
+        with tmp:
+            for chunk in chunks():
+                written += len(chunk)
+                if written > MAX_ATTACHMENT_BYTES:
+                    break
+                tmp.write(chunk)
+    except Exception as e:
+        # e.g. malformed base64: only this attachment fails
+        attachment["status"] = "failed"
+        attachment["error"] = f"Could not decode attachment: {e}"
+    else:
+        attachment["size"] = written
+        if not written or written > MAX_ATTACHMENT_BYTES:
+            attachment["status"] = "empty" if not written else "too_large"
+        else:
+            attachment["path"] = tmp.name
+            attachment["status"] = "pending"
+    finally:
+        if "path" not in attachment:
+            os.remove(tmp.name)
+    return attachment
+
+
+# Remove temp files of attachments that will never be parsed
+def _discard_spooled(attachments):
+    for att in attachments:
+        path = att.pop("path", None)
+        if path:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def _eml_payload(part):
+    """(approximate decoded size, chunk iterator) for an EML part, decoding base64 incrementally."""
+    raw = part.get_payload(decode=False)
+    if not isinstance(raw, str):
+        return 0, lambda: iter(())
+
+    if part.get("Content-Transfer-Encoding", "").strip().lower() != "base64":
+        # 7bit/8bit/quoted-printable never decode to more bytes than they encode
+        return len(raw), lambda: iter([part.get_payload(decode=True) or b""])
+
+    def chunks():
+        carry = ""
+        for offset in range(0, len(raw), SPOOL_CHUNK):
+            piece = carry + "".join(raw[offset:offset + SPOOL_CHUNK].split())
+            cut = len(piece) // 4 * 4
+            carry = piece[cut:]
+            if cut:
+                yield base64.b64decode(piece[:cut])
+        if carry.rstrip("="):
+            yield base64.b64decode(carry + "=" * (-len(carry) % 4))
+
+    # Line breaks are counted too, so this slightly overestimates
+    return len(raw) * 3 // 4, chunks
+
+
+# 📎 EML attachments → temp files
+def extract_attachments_from_eml(file):
+    file.seek(0)
+    msg = email.message_from_binary_file(file, policy=policy.default)
+    attachments = []
+    try:
+        for part in msg.walk():
+            filename = part.get_filename()
+            if part.is_multipart() or not filename:
+                continue
+            attachments.append(_spool_attachment(filename, *_eml_payload(part)))
+    except Exception:
+        _discard_spooled(attachments)
+        raise
+    return attachments
+
+
+# 📎 MSG attachments → temp files
+#    (extract_msg reads attachment streams when the message is opened, so only
+#    the copy to disk can be skipped for oversized ones)
+def extract_attachments_from_msg(file):
+    file.seek(0)
+    msg = extract_msg.Message(file)
+    attachments = []
+    try:
+        for att in msg.attachments:
+            filename = att.longFilename or att.shortFilename or ""
+            data = att.data if isinstance(att.data, (bytes, bytearray)) else b""  # skip embedded messages
+            view = memoryview(data)
+            attachments.append(_spool_attachment(
+                filename,
+                len(data),
+                lambda view=view: (view[i:i + SPOOL_CHUNK] for i in range(0, len(view), SPOOL_CHUNK)),
+            ))
+    except Exception:
+        _discard_spooled(attachments)
+        raise
+    return attachments
+
+
+def _parse_spooled(attachment, started):
+    # Read the path up front: parse_attachments drops it from `attachment`
+    # when it returns, possibly before an abandoned parse finishes
+    path = attachment["path"]
+    started[path] = time.monotonic()
+    try:
+        with open(path, "rb") as f:
+            return extract_text_by_type(f, attachment["ext"])
+    finally:
+        os.remove(path)
+
+
+# ⚡ Parse spooled attachments concurrently. Each parse gets `timeout` seconds
+#    once it starts, and the whole call ends by `deadline` seconds even if
+#    attachments are still queued behind stuck parses.
+def parse_attachments(attachments, timeout=ATTACHMENT_TIMEOUT, deadline=ATTACHMENT_DEADLINE):
+    call_deadline = time.monotonic() + deadline
+    started = {}
+    pool = _get_pool()
+    pending = {
+        pool.submit(_parse_spooled, att, started): att
+        for att in attachments
+        if att["status"] == "pending"
+    }
+
+    while pending:
+        done, _ = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+        for future in done:
+            att = pending.pop(future)
+            try:
+                att["text"], att["metadata"] = future.result()
+                att["status"] = "processed"
+            except Exception as e:
+                att["status"] = "failed"
+                att["error"] = str(e)
+
+        now = time.monotonic()
+        for future, att in list(pending.items()):
+            start = started.get(att["path"])
+            if now < call_deadline and (start is None or now - start <= timeout):
+                continue
+            pending.pop(future)
+            att["status"] = "timeout"
+            if future.cancel():
+                os.remove(att["path"])  # never started, so _parse_spooled won't clean up
+            else:
+                _abandon(future)
+
+        # Every worker of this pool is stuck: move parses that haven't started
+        # to a fresh pool instead of letting them wait out the deadline
+        fresh = _get_pool()
+        if fresh is not pool:
+            for future, att in list(pending.items()):
+                if att["path"] not in started and future.cancel():
+                    pending.pop(future)
+                    pending[fresh.submit(_parse_spooled, att, started)] = att
+            pool = fresh
+
+    for att in attachments:
+        att.pop("path", None)
+    return attachments
@@ -0,0 +1,89 @@
+import gzip
+import hashlib
+import zlib
+
+from flask import Response, request
+
+# ───────────────────────────────
+# Response compression + ETag helpers
+# ───────────────────────────────
+ENCODINGS = ("gzip", "deflate")
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/plain", "text/html"}
+MIN_COMPRESS_BYTES = 1024
+COMPRESS_LEVEL = 6
+
+
+def negotiate_encoding():
+    return request.accept_encodings.best_match(ENCODINGS)
+
+
+# ✅ Strong ETag for a document representation; changes whenever the text
+#    (content hash) or the row (updated_at) changes
+def document_etag(doc_id, content_hash, updated_at, variant=""):
+    parts = [str(doc_id), content_hash or "", updated_at.isoformat() if updated_at else "", variant]
+    return hashlib.sha256(":".join(parts).encode("utf-8")).hexdigest()[:32]
+
+
+def is_not_modified(etag):
+    # Clients echo back the tag of the encoding they received, e.g. "<etag>-gzip"
+    if_none_match = request.if_none_match
+    if if_none_match.star_tag:
+        return True
+    return any(if_none_match.contains(tag) for tag in [etag] + [f"{etag}-{enc}" for enc in ENCODINGS])
+
+
+def not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def cacheable(response, etag):
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"  # always revalidate, reuse on 304
+    return response
+
+
+# ✅ after_request hook: gzip/deflate negotiated from Accept-Encoding.
+#    Encoded bodies get their own strong ETag (suffixed with the encoding);
+#    bodies left uncompressed keep the plain tag.
+def compress_response(response):
+    if response.is_streamed or response.direct_passthrough:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    etag, weak = response.get_etag()
+    if response.status_code == 304:
+        # Whether the cached 200 was encoded depends on its size and type, so
+        # echo back the variant the client revalidated with
+        if etag:
+            for enc in ENCODINGS:
+                if request.if_none_match.contains(f"{etag}-{enc}"):
+                    response.set_etag(f"{etag}-{enc}", weak)
+                    break
+        return response
+
+    encoding = negotiate_encoding()
+    if (
+        not encoding
+        or response.status_code != 200
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_BYTES:
+        return response
+
+    if encoding == "gzip":
+        body = gzip.compress(data, compresslevel=COMPRESS_LEVEL)
+    else:
+        body = zlib.compress(data, COMPRESS_LEVEL)
+
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
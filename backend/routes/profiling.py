@@ -0,0 +1,39 @@
+import os
+
+from flask import Blueprint, jsonify, request, send_from_directory, abort
+
+from services.profiler import PROFILE_DIR, list_profiles, token_matches
+
+profiling_bp = Blueprint("profiling", __name__)
+
+PROFILE_FILE_TYPES = {"prof": ".prof", "collapsed": ".collapsed"}
+
+
+def _authorized():
+    # Listing/downloading always needs the token; with only PROFILE_SAMPLE_RATE
+    # set there is none, and profiles stay on disk only
+    return token_matches(request.headers.get("X-Profile-Token"))
+
+
+# ───────────────────────────────
+# 🔬 Recent request profiles with their top functions
+@profiling_bp.route("/profiles", methods=["GET"])
+def get_profiles():
+    if not _authorized():
+        return jsonify({"error": "Unauthorized. Invalid or missing X-Profile-Token."}), 401
+    try:
+        limit = int(request.args.get("limit", 20))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    return jsonify(list_profiles(limit)), 200
+
+
+# ───────────────────────────────
+# 📥 Raw profile: pstats (.prof) or collapsed stacks for flamegraphs
+@profiling_bp.route("/profiles/<profile_id>/<kind>", methods=["GET"])
+def download_profile(profile_id, kind):
+    if not _authorized():
+        return jsonify({"error": "Unauthorized. Invalid or missing X-Profile-Token."}), 401
+    if kind not in PROFILE_FILE_TYPES:
+        abort(404, description="Unknown profile file type")
+    return send_from_directory(os.path.abspath(PROFILE_DIR), profile_id + PROFILE_FILE_TYPES[kind], as_attachment=True)
@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
 from services.llm import generate_decision
+from services.llm_scheduler import scheduler, BULK
+from models.document_model import Document
 import os
 import logging
 import google.generativeai as genai
@@ -92,7 +94,17 @@ def process_query():
         if not query:
             return jsonify({"error": "Query field is required."}), 400
 
-        result = generate_decision(query)
+        # Optional: answer against one specific policy instead of routing
+        document_id = data.get("document_id")
+        if document_id is not None:
+            try:
+                document_id = int(document_id)
+            except (TypeError, ValueError):
+                return jsonify({"error": "document_id must be an integer."}), 400
+            if not Document.query.get(document_id):
+                return jsonify({"error": f"Document {document_id} not found."}), 404
+
+        result = generate_decision(query, document_id=document_id)
         return jsonify(result), 200
 
     except Exception as e:
@@ -140,7 +152,7 @@ You are a health insurance policy analyst. Based on the policy document below, a
 Provide your answer in 1-2 sentences. Be clear and direct. Do not add disclaimers.
 """
             try:
-                response = model.generate_content(prompt)
+                response = scheduler.generate(model, prompt, priority=BULK)
                 answers.append(response.text.strip())
             except Exception as e:
                 logger.error(f"Gemini error: {e}")
@@ -151,3 +163,10 @@ Provide your answer in 1-2 sentences. Be clear and direct. Do not add disclaimer
     except Exception as e:
         logger.exception("Error in /hackrx/run")
         return jsonify({"error": "Internal server error", "message": str(e)}), 500
+
+
+# ───────────────────────────────
+# 📈 LLM scheduler metrics (queue depth, wait times, throttling)
+@query_bp.route("/llm/metrics", methods=["GET"])
+def llm_metrics():
+    return jsonify(scheduler.metrics()), 200
@@ -1,21 +1,32 @@
 from flask import Blueprint, request, jsonify
+import mimetypes
 import os
 
 from services.clause_extractor import extract_clauses_from_text
+from services.clause_enrichment import enrich_clauses
 from .document_parser import (
-    extract_text_from_pdf,
-    extract_text_from_docx,
-    extract_text_from_msg,
-    extract_text_from_eml,
+    extract_text_by_type,
+    split_pages,
+    extract_attachments_from_msg,
+    extract_attachments_from_eml,
+    parse_attachments,
 )
 
 from models.document_model import insert_document, get_document_by_id, serialize_document
-from models.clause_model import insert_clause
+from models.page_model import insert_pages
+from services.policy_versioning import hash_text, find_predecessor, sync_clauses
+from services.policy_router import router, build_profile
+from database import db
 
 upload_bp = Blueprint('upload', __name__)
 
 ALLOWED_EXTENSIONS = {'pdf', 'docx', 'msg', 'eml'}
 
+ATTACHMENT_EXTRACTORS = {
+    'msg': extract_attachments_from_msg,
+    'eml': extract_attachments_from_eml,
+}
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -30,6 +41,9 @@ def upload_file():
     if file.filename == '':
         return jsonify({"error": "No selected file"}), 400
 
+    # Full extracted text is left out of the response unless ?include_text=true
+    include_text = request.args.get("include_text", "false").lower() == "true"
+
     if file and allowed_file(file.filename):
         filename = file.filename
         ext = filename.rsplit('.', 1)[1].lower()
@@ -38,20 +52,37 @@ def upload_file():
         file.seek(0)  # Reset stream for parsers
 
         # ✨ Choose extractor based on file type
-        if ext == "pdf":
-            extracted_text, metadata = extract_text_from_pdf(file)
-        elif ext == "docx":
-            extracted_text = extract_text_from_docx(file)
-            metadata = {"source": "docx", "confidence": 0.95}
-        elif ext == "msg":
-            extracted_text = extract_text_from_msg(file)
-            metadata = {"source": "email-msg", "confidence": 0.94}
-        elif ext == "eml":
-            extracted_text = extract_text_from_eml(file)
-            metadata = {"source": "email-eml", "confidence": 0.94}
-        else:
+        try:
+            extracted_text, metadata = extract_text_by_type(file, ext)
+        except ValueError:
             return jsonify({"error": "Unsupported file format"}), 400
 
+        # ✅ Link to the version this upload replaces (explicit previous_version_id only)
+        predecessor = None
+        previous_version_id = request.form.get("previous_version_id")
+        if previous_version_id:
+            try:
+                predecessor = find_predecessor(previous_version_id)
+            except ValueError:
+                return jsonify({"error": "previous_version_id must be an integer"}), 400
+            if not predecessor:
+                return jsonify({"error": "Previous version not found"}), 404
+            # Only the head of a version chain can be revised
+            if predecessor.status == "superseded":
+                return jsonify({"error": "Previous version is already superseded; use the latest version's id"}), 409
+
+        content_hash = hash_text(extracted_text)
+        if predecessor and predecessor.content_hash == content_hash:
+            # Identical wording: nothing to re-insert, re-index or invalidate
+            return jsonify(serialize_document(predecessor, include_text)), 200
+
+        # ✅ Extract clauses and build the routing profile up front
+        page_offsets = metadata.get("pageOffsets")
+        clauses = enrich_clauses(extract_clauses_from_text(extracted_text, page_offsets))
+        # Claim emails are not policies, so they get no routing profile
+        if ext not in ATTACHMENT_EXTRACTORS:
+            metadata = {**metadata, "profile": build_profile(filename, extracted_text, clauses)}
+
         # ✅ Save document in DB
         doc_id = insert_document(
             name=filename,
@@ -59,24 +90,70 @@ def upload_file():
             size=len(file_content),
             extracted_text=extracted_text,
             metadata=metadata,
+            parent_id=predecessor.id if predecessor else None,
+            version=(predecessor.version or 1) + 1 if predecessor else 1,
+            content_hash=content_hash,
         )
 
-        # ✅ Extract clauses from text
-        clauses = extract_clauses_from_text(extracted_text)
+        # ✅ Store text per page so the viewer can load only what is visible
+        insert_pages(doc_id, split_pages(extracted_text, page_offsets))
 
-        # ✅ Insert clauses into DB
-        for clause in clauses:
-            insert_clause(
-                clause_id=clause.get("clause_id"),
-                document_id=doc_id,
-                content=clause.get("text"),
-                title=clause.get("title"),
-                page_number=clause.get("page"),
-                keywords=clause.get("keywords", []),
-            )
+        # ✅ Write only the clauses that differ from the previous version
+        clause_diff = sync_clauses(doc_id, clauses, predecessor)
+
+        # ✅ Route queries to the new version instead of the one it replaces
+        if predecessor:
+            router.remove(predecessor.id)
+        if "profile" in metadata:
+            router.add(doc_id, filename, metadata["profile"])
+
+        # 📎 Emails: parse attachments concurrently and store them as child documents
+        attachment_summary = None
+        if ext in ATTACHMENT_EXTRACTORS:
+            try:
+                attachments = parse_attachments(ATTACHMENT_EXTRACTORS[ext](file))
+                attachment_summary = [save_attachment(doc_id, att) for att in attachments]
+            except Exception as e:
+                print(f"[ERROR] Attachment extraction failed for {filename}: {e}")
+                attachment_summary = [{"status": "failed", "error": str(e)}]
 
-        # ✅ Return the document object
         doc = get_document_by_id(doc_id)
-        return jsonify(serialize_document(doc)), 200
+        extra = {"clauseDiff": clause_diff}
+        if attachment_summary is not None:
+            extra["attachments"] = attachment_summary
+        doc.doc_metadata = {**(doc.doc_metadata or {}), **extra}
+        db.session.commit()
+
+        # ✅ Return the document object
+        return jsonify(serialize_document(doc, include_text)), 200
 
     return jsonify({"error": "Invalid file format"}), 400
+
+
+# ✅ Store one parsed email attachment as a child document of the email
+def save_attachment(email_doc_id, attachment):
+    summary = {
+        "name": attachment["name"],
+        "size": attachment["size"],
+        "status": attachment["status"],
+    }
+    if attachment.get("error"):
+        summary["error"] = attachment["error"]
+    if attachment["status"] != "processed":
+        return summary
+
+    text = attachment["text"]
+    child_id = insert_document(
+        name=attachment["name"],
+        file_type=mimetypes.guess_type(attachment["name"])[0] or "application/octet-stream",
+        size=attachment["size"],
+        extracted_text=text,
+        metadata={**attachment["metadata"], "source": "email-attachment"},
+        content_hash=hash_text(text),
+        email_id=email_doc_id,
+    )
+    page_offsets = attachment["metadata"].get("pageOffsets")
+    insert_pages(child_id, split_pages(text, page_offsets))
+    sync_clauses(child_id, enrich_clauses(extract_clauses_from_text(text, page_offsets)))
+    summary["documentId"] = child_id
+    return summary
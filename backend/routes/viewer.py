@@ -1,9 +1,18 @@
-from flask import Blueprint, jsonify, abort
-from models.document_model import Document
+from flask import Blueprint, jsonify, abort, request
+from models.document_model import Document, public_metadata
+from models.clause_model import Clause
+from models.page_model import insert_pages, get_page_range, count_pages, serialize_page
 from database import db
+from sqlalchemy.exc import IntegrityError
+from services.policy_versioning import get_version_history
+from .http_cache import document_etag, is_not_modified, not_modified, cacheable
+from .document_parser import split_pages
 
 viewer_bp = Blueprint("viewer", __name__)
 
+MAX_PAGES_PER_REQUEST = 50
+MAX_CLAUSE_WINDOW = 5
+
 # ────────────────────────────────────────────────
 # List all processed documents
 # ────────────────────────────────────────────────
@@ -18,7 +27,8 @@ def list_documents():
             "size": d.size,
             "uploadedAt": d.uploaded_at.isoformat(),
             "status": d.status,
-            "metadata": d.doc_metadata or {},
+            "version": d.version or 1,
+            "metadata": public_metadata(d.doc_metadata),
             "pages": (d.doc_metadata or {}).get("pages"),
         }
         for d in docs
@@ -30,10 +40,20 @@ def list_documents():
 # ────────────────────────────────────────────────
 @viewer_bp.route("/documents/<int:doc_id>", methods=["GET"])
 def get_document(doc_id: int):
-    doc = Document.query.get(doc_id)
-    if not doc:
+    # Check the ETag without loading the (possibly multi-MB) extracted text
+    row = (
+        db.session.query(Document.content_hash, Document.updated_at)
+        .filter(Document.id == doc_id)
+        .first()
+    )
+    if not row:
         abort(404, description="Document not found")
 
+    etag = document_etag(doc_id, row.content_hash, row.updated_at, "full")
+    if is_not_modified(etag):
+        return not_modified(etag)
+
+    doc = Document.query.get(doc_id)
     out = {
         "id": doc.id,
         "name": doc.name,
@@ -41,7 +61,117 @@ def get_document(doc_id: int):
         "size": doc.size,
         "uploadedAt": doc.uploaded_at.isoformat(),
         "status": doc.status,
-        "metadata": doc.doc_metadata or {},
+        "metadata": public_metadata(doc.doc_metadata),
         "extractedText": doc.extracted_text,
     }
+    return cacheable(jsonify(out), etag)
+
+# ────────────────────────────────────────────────
+# Version history with per-version clause diff counts
+# ────────────────────────────────────────────────
+@viewer_bp.route("/documents/<int:doc_id>/versions", methods=["GET"])
+def get_document_versions(doc_id: int):
+    doc = Document.query.get(doc_id)
+    if not doc:
+        abort(404, description="Document not found")
+
+    out = [
+        {
+            "id": d.id,
+            "name": d.name,
+            "version": d.version or 1,
+            "previousVersionId": d.parent_id,
+            "uploadedAt": d.uploaded_at.isoformat(),
+            "status": d.status,
+            "clauseDiff": (d.doc_metadata or {}).get("clauseDiff"),
+        }
+        for d in get_version_history(doc)
+    ]
     return jsonify(out)
+
+
+# ────────────────────────────────────────────────
+# Page-level access (load only what the viewer shows)
+# ────────────────────────────────────────────────
+def _document_version_or_404(doc_id):
+    row = (
+        db.session.query(Document.content_hash, Document.updated_at)
+        .filter(Document.id == doc_id)
+        .first()
+    )
+    if not row:
+        abort(404, description="Document not found")
+    return row
+
+
+def _ensure_pages(doc_id):
+    # Documents ingested before per-page storage are split on first access
+    total = count_pages(doc_id)
+    if total == 0:
+        doc = Document.query.get(doc_id)
+        if doc.extracted_text:
+            try:
+                total = insert_pages(doc_id, split_pages(doc.extracted_text, (doc.doc_metadata or {}).get("pageOffsets")))
+            except IntegrityError:
+                # A concurrent first request stored them already
+                db.session.rollback()
+                total = count_pages(doc_id)
+    return total
+
+
+def _page_range_response(doc_id, row, start, end, extra=None):
+    total = _ensure_pages(doc_id)
+    if start > total:
+        return jsonify({"error": f"Page {start} is out of range", "totalPages": total}), 404
+
+    end = min(end, start + MAX_PAGES_PER_REQUEST - 1)
+    etag = document_etag(doc_id, row.content_hash, row.updated_at, f"pages:{start}-{end}")
+    if is_not_modified(etag):
+        return not_modified(etag)
+
+    out = {
+        "documentId": doc_id,
+        "totalPages": total,
+        "start": start,
+        "end": min(end, total),
+        "pages": [serialize_page(p) for p in get_page_range(doc_id, start, end)],
+        **(extra or {}),
+    }
+    return cacheable(jsonify(out), etag)
+
+
+# GET /documents/<id>/pages?start=1&end=5
+@viewer_bp.route("/documents/<int:doc_id>/pages", methods=["GET"])
+def get_document_pages(doc_id: int):
+    row = _document_version_or_404(doc_id)
+    try:
+        start = int(request.args.get("start", 1))
+        end = int(request.args.get("end", start))
+    except ValueError:
+        return jsonify({"error": "start and end must be integers"}), 400
+    if start < 1 or end < start:
+        return jsonify({"error": "Expected 1 <= start <= end"}), 400
+
+    return _page_range_response(doc_id, row, start, end)
+
+
+# GET /documents/<id>/clauses/C042/pages?window=1 → page holding the clause ± window
+@viewer_bp.route("/documents/<int:doc_id>/clauses/<clause_id>/pages", methods=["GET"])
+def get_clause_pages(doc_id: int, clause_id: str):
+    row = _document_version_or_404(doc_id)
+    clause = Clause.query.filter_by(document_id=doc_id, clause_id=clause_id).first()
+    if not clause:
+        abort(404, description="Clause not found")
+    if clause.page_number is None:
+        return jsonify({"error": f"Page of clause {clause_id} is unknown"}), 404
+
+    try:
+        window = int(request.args.get("window", 0))
+    except ValueError:
+        return jsonify({"error": "window must be an integer"}), 400
+    window = max(0, min(window, MAX_CLAUSE_WINDOW))
+
+    anchor = {"clause": {"clauseId": clause.clause_id, "title": clause.title, "page": clause.page_number}}
+    return _page_range_response(
+        doc_id, row, max(1, clause.page_number - window), clause.page_number + window, anchor
+    )
@@ -0,0 +1,202 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+
+from database import db
+from models.batch_job_model import BatchJob
+from models.document_model import Document
+from services.llm import generate_decision
+from services.llm_scheduler import BULK, scheduler
+
+logger = logging.getLogger(__name__)
+
+BATCH_JOBS_DIR = os.getenv("BATCH_JOBS_DIR", "batch_jobs")
+HEARTBEAT_SECONDS = 5
+STALE_AFTER_SECONDS = HEARTBEAT_SECONDS * 6
+PROGRESS_EVERY = 25  # persist counters at least every N results
+
+# ✅ Default and maximum lines in flight per job. The LLM scheduler is the
+#    only throttle, so a job can keep every LLM slot busy.
+def max_concurrency():
+    return scheduler.max_concurrency
+
+
+# job_id -> runner thread, for jobs running in this process
+_active_runners = {}
+_active_lock = threading.Lock()
+
+
+def job_dir(job_id):
+    return os.path.join(BATCH_JOBS_DIR, str(job_id))
+
+
+def input_path(job_id):
+    return os.path.join(job_dir(job_id), "input.jsonl")
+
+
+def results_path(job_id):
+    return os.path.join(job_dir(job_id), "results.jsonl")
+
+
+# ✅ Save the uploaded JSONL and count its non-blank lines
+def store_input(job_id, stream):
+    os.makedirs(job_dir(job_id), exist_ok=True)
+    total = 0
+    with open(input_path(job_id), "wb") as f:
+        for raw in stream:
+            f.write(raw)
+            if raw.strip():
+                total += 1
+    return total
+
+
+def _parse_line(raw):
+    item = json.loads(raw)
+    if isinstance(item, str):
+        item = {"query": item}
+    if not isinstance(item, dict) or not str(item.get("query", "")).strip():
+        raise ValueError("Each line must be a JSON object with a non-empty 'query'.")
+    document_id = item.get("document_id")
+    return str(item["query"]).strip(), int(document_id) if document_id is not None else None
+
+
+# ✅ Checkpoint = results already written. Drops a torn last line left by a crash.
+def load_checkpoint(job_id):
+    path = results_path(job_id)
+    done, completed, failed = set(), 0, 0
+    if not os.path.exists(path):
+        return done, completed, failed
+
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+
+    for raw in data[:end].splitlines():
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            continue
+        done.add(record["line"])
+        if record.get("status") == "ok":
+            completed += 1
+        else:
+            failed += 1
+    return done, completed, failed
+
+
+def _iter_pending(job_id, done):
+    with open(input_path(job_id), "rb") as f:
+        for line_number, raw in enumerate(f, start=1):
+            if raw.strip() and line_number not in done:
+                yield line_number, raw
+
+
+def _run_one(app, line_number, raw):
+    try:
+        query, document_id = _parse_line(raw)
+    except (ValueError, TypeError) as e:
+        return {"line": line_number, "status": "invalid", "error": str(e)}
+
+    with app.app_context():
+        try:
+            # Same check as /api/query: an unknown policy is an input error,
+            # not something to answer against the fallback policy
+            if document_id is not None and not Document.query.get(document_id):
+                return {"line": line_number, "status": "invalid", "query": query, "error": f"Document {document_id} not found."}
+            result = generate_decision(query, document_id=document_id, priority=BULK)
+            return {"line": line_number, "status": "ok", "query": query, "result": result}
+        except Exception as e:
+            logger.error(f"Batch line {line_number} failed: {e}")
+            return {"line": line_number, "status": "error", "query": query, "error": str(e)}
+        finally:
+            db.session.remove()
+
+
+def _save_progress(job, completed, failed):
+    job.completed = completed
+    job.failed = failed
+    job.heartbeat_at = datetime.utcnow()
+    db.session.commit()
+
+
+def _run_job(app, job_id):
+    with app.app_context():
+        job = BatchJob.query.get(job_id)
+        try:
+            done, completed, failed = load_checkpoint(job_id)
+            job.status = "running"
+            job.error = None
+            job.started_at = job.started_at or datetime.utcnow()
+            _save_progress(job, completed, failed)
+
+            pending_lines = _iter_pending(job_id, done)
+            concurrency = max(1, min(job.concurrency or max_concurrency(), max_concurrency()))
+            max_in_flight = concurrency * 2
+            last_saved = datetime.utcnow()
+            unsaved = 0
+
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"batch-{job_id}") as pool, \
+                    open(results_path(job_id), "a", encoding="utf-8") as out:
+                in_flight = set()
+                exhausted = False
+                while in_flight or not exhausted:
+                    # Keep the pool busy without reading the whole input into memory
+                    while not exhausted and len(in_flight) < max_in_flight:
+                        nxt = next(pending_lines, None)
+                        if nxt is None:
+                            exhausted = True
+                        else:
+                            in_flight.add(pool.submit(_run_one, app, *nxt))
+                    if not in_flight:
+                        break
+
+                    finished, in_flight = wait(in_flight, timeout=HEARTBEAT_SECONDS, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        record = future.result()
+                        out.write(json.dumps(record, default=str) + "\n")
+                        if record["status"] == "ok":
+                            completed += 1
+                        else:
+                            failed += 1
+                        unsaved += 1
+                    out.flush()
+
+                    now = datetime.utcnow()
+                    if unsaved >= PROGRESS_EVERY or (now - last_saved).total_seconds() >= HEARTBEAT_SECONDS:
+                        os.fsync(out.fileno())
+                        _save_progress(job, completed, failed)
+                        last_saved, unsaved = now, 0
+
+            job.status = "completed"
+            job.finished_at = datetime.utcnow()
+            _save_progress(job, completed, failed)
+        except Exception as e:
+            logger.exception(f"Batch job {job_id} failed")
+            db.session.rollback()
+            job.status = "failed"
+            job.error = str(e)
+            db.session.commit()
+        finally:
+            with _active_lock:
+                _active_runners.pop(job_id, None)
+
+
+def is_running_here(job_id):
+    with _active_lock:
+        return job_id in _active_runners
+
+
+# ✅ Start (or resume) a job in a background thread of this process
+def start_job(app, job_id):
+    with _active_lock:
+        if job_id in _active_runners:
+            return False
+        thread = threading.Thread(target=_run_job, args=(app, job_id), name=f"batch-job-{job_id}", daemon=True)
+        _active_runners[job_id] = thread
+    thread.start()
+    return True
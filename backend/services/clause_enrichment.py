@@ -0,0 +1,72 @@
+import re
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+TOP_KEYWORDS = 8
+
+# Lexicon classifier: category → patterns. Title hits count more than body hits.
+CATEGORY_PATTERNS = {
+    "waiting_period": [r"waiting period", r"\bwait(?:ing)?\b", r"pre-?existing", r"\bcontinuous coverage\b", r"\bmoratorium\b"],
+    "exclusion": [r"\bexclu(?:sion|sions|ded|de)\b", r"\bnot (?:be )?(?:covered|payable|admissible)\b", r"\bno (?:claim|benefit)s? shall\b"],
+    "sub_limit": [r"sub-?limit", r"\blimited to\b", r"\bmaximum of\b", r"\bup to\b", r"\bcapped\b", r"room rent"],
+    "co_payment": [r"co-?pay(?:ment)?", r"\bdeductible\b", r"\bcost[- ]sharing\b"],
+    "claim_procedure": [r"\bclaim(?:s)? (?:procedure|process|intimation|settlement)\b", r"\bintimat", r"\bcashless\b", r"\breimbursement\b", r"\bdocuments? required\b"],
+    "renewal_cancellation": [r"\brenew(?:al|ed)?\b", r"\bcancel(?:lation|led)?\b", r"\bfree look\b", r"\bgrace period\b", r"\bportability\b"],
+    "definition": [r"\bdefinitions?\b", r"\bmeans\b", r"\bshall mean\b", r"\brefers to\b"],
+    "coverage": [r"\bcover(?:age|ed|s)?\b", r"\bbenefits?\b", r"\bindemnif", r"\bpayable\b", r"\bhospitali[sz]ation\b"],
+}
+TITLE_WEIGHT = 3
+
+_COMPILED = {
+    category: [re.compile(p, re.IGNORECASE) for p in patterns]
+    for category, patterns in CATEGORY_PATTERNS.items()
+}
+
+
+# ✅ Rule/lexicon category for a single piece of text (None if nothing matches)
+def classify_text(text, title=None):
+    best, best_score = None, 0
+    for category, patterns in _COMPILED.items():
+        score = 0
+        for pattern in patterns:
+            if title:
+                score += TITLE_WEIGHT * len(pattern.findall(title))
+            score += len(pattern.findall(text or ""))
+        # Ties keep the earlier (more specific) category
+        if score > best_score:
+            best, best_score = category, score
+    return best
+
+
+# ✅ Batch enrichment of one document's clauses: TF-IDF top terms + category.
+#    Mutates and returns the clause dicts ("keywords", "category").
+def enrich_clauses(clauses, top_k=TOP_KEYWORDS):
+    texts = [f"{c.get('title') or ''} {c.get('text') or ''}" for c in clauses]
+    keywords = [[] for _ in clauses]
+
+    if any(t.strip() for t in texts):
+        vectorizer = TfidfVectorizer(
+            stop_words="english",
+            token_pattern=r"(?u)\b[a-zA-Z][a-zA-Z\-]{2,}\b",
+            sublinear_tf=True,
+        )
+        try:
+            matrix = vectorizer.fit_transform(texts).tocsr()
+        except ValueError:
+            matrix = None  # only stop words in the whole document
+
+        if matrix is not None:
+            vocabulary = vectorizer.get_feature_names_out()
+            for row in range(matrix.shape[0]):
+                start, end = matrix.indptr[row], matrix.indptr[row + 1]
+                if start == end:
+                    continue
+                scores = matrix.data[start:end]
+                columns = matrix.indices[start:end]
+                top = scores.argsort()[::-1][:top_k]
+                keywords[row] = [str(vocabulary[columns[i]]) for i in top]
+
+    for clause, terms in zip(clauses, keywords):
+        clause["keywords"] = terms
+        clause["category"] = classify_text(clause.get("text"), clause.get("title"))
+    return clauses
@@ -36,8 +36,9 @@ def extract_text_from_pdf(file):
             "error": str(e)
         }
 import re
+from bisect import bisect_right
 
-def extract_clauses_from_text(text):
+def extract_clauses_from_text(text, page_offsets=None):
     pattern = r"(?:(Section|Clause)\s+\d+(?:\.\d+)*[:.\s])|(^[A-Za-z\s]+:)"
     matches = list(re.finditer(pattern, text, re.MULTILINE))
 
@@ -53,7 +54,8 @@ def extract_clauses_from_text(text):
                 "title": heading.replace(":", "").strip(),
                 "text": clause_text,
                 "keywords": [],
-                "page": None
+                # 1-based page the clause heading starts on, when page boundaries are known
+                "page": bisect_right(page_offsets, match.start()) if page_offsets else None
             })
     return clauses
 
@@ -5,18 +5,16 @@ import google.generativeai as genai
 from models.document_model import Document
 from database import db
 from models.clause_model import Clause
+from services.policy_router import router, EMAIL_EXTENSIONS
+from services.llm_scheduler import scheduler, INTERACTIVE
+from services.clause_enrichment import classify_text
 
 # 🔐 Configure Gemini
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 model = genai.GenerativeModel("gemini-1.5-flash")  # You may switch to gemini-1.5-pro if needed
 
-# ✅ Get trimmed policy text for faster LLM processing
-def get_all_policy_text():
-    document = Document.query.order_by(Document.created_at.desc()).first()
-    if not document or not document.extracted_text:
-        return "No extracted policy text found."
-
-    raw_text = document.extracted_text
+# ✅ Trim policy text for faster LLM processing
+def trim_policy_text(raw_text):
     important_sections = []
     for section_title in ["SECTION B", "Waiting Period", "Coverage", "Exclusions"]:
         match = re.search(rf"{section_title}.*?(?=SECTION|\Z)", raw_text, re.DOTALL | re.IGNORECASE)
@@ -26,8 +24,48 @@ def get_all_policy_text():
     return "\n\n".join(important_sections) if important_sections else raw_text
 
 
+# ✅ Get trimmed policy text for the routed documents
+def get_all_policy_text(document_ids):
+    documents = Document.query.filter(Document.id.in_(document_ids)).all() if document_ids else []
+    documents.sort(key=lambda d: document_ids.index(d.id))
+    documents = [d for d in documents if d.extracted_text]
+    if not documents:
+        return "No extracted policy text found."
+    if len(documents) == 1:
+        return trim_policy_text(documents[0].extracted_text)
+
+    return "\n\n".join(
+        f"=== {d.name} ===\n{trim_policy_text(d.extracted_text)}" for d in documents
+    )
+
+
+# ✅ Latest policy that can be answered against: current version, not a
+#    claim email or one of its attachments
+def latest_policy():
+    query = Document.query.filter(Document.status != "superseded", Document.email_id.is_(None))
+    for ext in EMAIL_EXTENSIONS:
+        query = query.filter(~Document.name.ilike(f"%{ext}"))
+    return query.order_by(Document.created_at.desc()).first()
+
+
+# ✅ Pick the policies a query should be answered against. The same ids feed
+#    the prompt, clause matching and the "documents" field of the result.
+def route_query(query, document_id=None):
+    if document_id is not None:
+        doc = Document.query.get(document_id)
+        return [{"id": doc.id, "name": doc.name, "score": None}] if doc else []
+
+    candidates = router.route(query)
+    if candidates:
+        return candidates
+
+    # Nothing matched the query's terms: fall back to the latest policy
+    doc = latest_policy()
+    return [{"id": doc.id, "name": doc.name, "score": None}] if doc else []
+
+
 # ✅ Parse Gemini's response into structured format
-def parse_response(response_text):
+def parse_response(response_text, document_ids=None):
     decision_match = re.search(r"\*\*Claim:\*\*\s*(APPROVED|REJECTED)", response_text, re.IGNORECASE)
     decision = decision_match.group(1).capitalize() if decision_match else "Unknown"
 
@@ -47,7 +85,7 @@ def parse_response(response_text):
     confidence_map = {"Low": 0.4, "Medium": 0.6, "High": 0.95}
     confidence = confidence_map.get(confidence_str, 0.6)
 
-    structured_clauses = match_clauses_to_db(clause_lines)
+    structured_clauses = match_clauses_to_db(clause_lines, document_ids)
     justification = f"""
 Decision: The claim is **{decision}**.
 
@@ -92,27 +130,59 @@ def extract_structured_info(text):
 
 
 # 🔍 Match Gemini’s clause text to your clause DB
-def match_clauses_to_db(text_clauses):
-    all_clauses = Clause.query.all()
+MATCH_THRESHOLD = 0.3
+# A same-category match at least this good is taken without scanning the
+# other categories; weaker ones are compared against every clause
+CATEGORY_MATCH_SCORE = 0.6
+
+
+def match_clauses_to_db(text_clauses, document_ids=None):
+    def clause_query():
+        query = Clause.query.filter(Clause.content.isnot(None))
+        if document_ids is not None:
+            query = query.filter(Clause.document_id.in_(document_ids))
+        return query
+
+    clause_words = {}
+    by_category = {}
+    all_clauses = None
+
+    def category_clauses(category):
+        if category not in by_category:
+            by_category[category] = clause_query().filter(Clause.category == category).all()
+        return by_category[category]
+
+    def best_of(txt, candidates):
+        words = set(txt.lower().split())
+        best_match, best_score = None, 0
+        for clause in candidates:
+            if clause.id not in clause_words:
+                clause_words[clause.id] = set(clause.content.lower().split())
+            common = words.intersection(clause_words[clause.id])
+            score = len(common) / max(len(txt.split()), 1)
+            if score > best_score:
+                best_score = score
+                best_match = clause
+        return best_match, best_score
+
     structured = []
 
     for txt in text_clauses:
-        best_match = None
-        best_score = 0
-
-        for clause in all_clauses:
-            if clause.content:
-                common = set(txt.lower().split()).intersection(set(clause.content.lower().split()))
-                score = len(common) / max(len(txt.split()), 1)
-                if score > best_score:
-                    best_score = score
-                    best_match = clause
-
-        if best_match and best_score > 0.3:
+        # Same-category clauses first (indexed in SQL); fall back to all of them
+        # unless that already gave a strong match
+        category = classify_text(txt)
+        best_match, best_score = best_of(txt, category_clauses(category)) if category else (None, 0)
+        if best_score < CATEGORY_MATCH_SCORE:
+            if all_clauses is None:
+                all_clauses = clause_query().all()
+            best_match, best_score = best_of(txt, all_clauses)
+
+        if best_match and best_score > MATCH_THRESHOLD:
             structured.append({
                 "clauseId": best_match.clause_id,
                 "text": best_match.content[:300] + "...",
                 "page": best_match.page_number,
+                "documentId": best_match.document_id,
                 "document": Document.query.get(best_match.document_id).name if best_match.document_id else "Unknown",
                 "relevanceScore": round(best_score, 2)
             })
@@ -121,6 +191,7 @@ def match_clauses_to_db(text_clauses):
                 "clauseId": "N/A",
                 "text": txt,
                 "page": None,
+                "documentId": None,
                 "document": "Not found",
                 "relevanceScore": 0.0
             })
@@ -129,8 +200,10 @@ def match_clauses_to_db(text_clauses):
 
 
 # 🚀 Generate Decision Using Gemini
-def generate_decision(query):
-    policy_text = get_all_policy_text()
+def generate_decision(query, document_id=None, priority=INTERACTIVE):
+    candidates = route_query(query, document_id)
+    document_ids = [c["id"] for c in candidates]
+    policy_text = get_all_policy_text(document_ids)
     prompt = f"""
 You are a health insurance expert. Based on the following policy and user query, determine:
 
@@ -154,5 +227,7 @@ You are a health insurance expert. Based on the following policy and user query,
 </User Query>
 """
 
-    response = model.generate_content(prompt)
-    return parse_response(response.text)
+    response = scheduler.generate(model, prompt, priority=priority)
+    result = parse_response(response.text, document_ids)
+    result["documents"] = candidates
+    return result
@@ -0,0 +1,263 @@
+import heapq
+import itertools
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes (lower value is served first)
+INTERACTIVE = 0
+BULK = 1
+LANE_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+OUTPUT_TOKEN_ESTIMATE = 512
+THROTTLE_MARKERS = ("Resource has been exhausted", "RESOURCE_EXHAUSTED", "Too Many Requests", "rate limit exceeded")
+
+
+def estimate_tokens(prompt):
+    # ~4 characters per token plus room for the answer
+    return len(prompt) // 4 + OUTPUT_TOKEN_ESTIMATE
+
+
+def is_throttled(error):
+    """True for quota / rate-limit errors (HTTP 429, gRPC RESOURCE_EXHAUSTED)."""
+    if getattr(error, "code", None) == 429 or getattr(error, "status_code", None) == 429:
+        return True
+    if type(error).__name__ in ("ResourceExhausted", "TooManyRequests"):
+        return True
+    # Wrapped errors: only quota/status wording, never any message mentioning "429"
+    message = str(error)
+    return message.startswith("429 ") or any(marker in message for marker in THROTTLE_MARKERS)
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute, holding at most `per_minute`."""
+
+    def __init__(self, per_minute, clock=time.monotonic):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay_for(self, amount):
+        """Seconds until `amount` units are available (0 if available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def consume(self, amount):
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount):
+        # Correct an estimate once the real usage is known (may go negative)
+        self.level = min(self.capacity, self.level - amount)
+
+
+class _Call:
+    __slots__ = ("fn", "args", "kwargs", "priority", "seq", "tokens", "future", "enqueued_at", "attempt", "not_before")
+
+    def __init__(self, fn, args, kwargs, priority, seq, tokens, enqueued_at):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.future = Future()
+        self.enqueued_at = enqueued_at
+        self.attempt = 0
+        self.not_before = 0.0
+
+
+class LLMScheduler:
+    """
+    Central gate for LLM calls: request and token buckets, a priority queue
+    that serves interactive traffic before bulk, and retry with exponential
+    backoff + full jitter when the provider throttles.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute=60,
+        tokens_per_minute=1_000_000,
+        max_concurrency=4,
+        max_retries=5,
+        backoff_base=1.0,
+        backoff_max=32.0,
+        clock=time.monotonic,
+        wait=None,
+    ):
+        self.request_bucket = TokenBucket(requests_per_minute, clock)
+        self.token_bucket = TokenBucket(tokens_per_minute, clock)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.clock = clock
+        # wait(condition, seconds): timed pauses for rate limits and backoff.
+        # Tests pass one that advances a fake `clock` instead of sleeping.
+        self.wait = wait or (lambda condition, seconds: condition.wait(seconds))
+
+        self._cond = threading.Condition()
+        self._queue = []                     # (priority, seq, call)
+        self._seq = itertools.count()
+        self._blocked_until = 0.0            # set on 429 so every worker backs off
+        self._workers = []
+        self._in_flight = 0
+        self._waits = {lane: deque(maxlen=500) for lane in LANE_NAMES}
+        self._counters = {"completed": 0, "failed": 0, "throttled": 0, "retries": 0}
+
+    # ───────────────────────────────
+    # Public API
+    def submit(self, fn, *args, priority=INTERACTIVE, tokens=1, **kwargs):
+        with self._cond:
+            call = _Call(fn, args, kwargs, priority, next(self._seq), tokens, self.clock())
+            self._start_workers()
+            heapq.heappush(self._queue, (priority, call.seq, call))
+            self._cond.notify()
+        return call.future
+
+    def call(self, fn, *args, priority=INTERACTIVE, tokens=1, timeout=None, **kwargs):
+        return self.submit(fn, *args, priority=priority, tokens=tokens, **kwargs).result(timeout)
+
+    def generate(self, model, prompt, priority=INTERACTIVE):
+        """Scheduled `model.generate_content(prompt)`."""
+        estimate = estimate_tokens(prompt)
+        response = self.call(model.generate_content, prompt, priority=priority, tokens=estimate)
+
+        usage = getattr(response, "usage_metadata", None)
+        actual = getattr(usage, "total_token_count", None)
+        if actual:
+            with self._cond:
+                self.token_bucket.adjust(actual - estimate)
+        return response
+
+    def metrics(self):
+        with self._cond:
+            depth = {name: 0 for name in LANE_NAMES.values()}
+            for priority, _, _ in self._queue:
+                lane = LANE_NAMES.get(priority, str(priority))
+                depth[lane] = depth.get(lane, 0) + 1
+
+            wait_stats = {}
+            for lane, waits in self._waits.items():
+                ordered = sorted(waits)
+                wait_stats[LANE_NAMES.get(lane, str(lane))] = {
+                    "samples": len(ordered),
+                    "avgSeconds": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+                    "p95Seconds": round(ordered[math.ceil(0.95 * len(ordered)) - 1], 3) if ordered else 0.0,
+                    "maxSeconds": round(ordered[-1], 3) if ordered else 0.0,
+                }
+
+            return {
+                "queueDepth": depth,
+                "inFlight": self._in_flight,
+                "waitTime": wait_stats,
+                "backoffRemainingSeconds": round(max(0.0, self._blocked_until - self.clock()), 3),
+                **self._counters,
+            }
+
+    # ───────────────────────────────
+    # Workers
+    def _start_workers(self):
+        while len(self._workers) < self.max_concurrency:
+            worker = threading.Thread(target=self._worker, name=f"llm-scheduler-{len(self._workers)}", daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _next_call(self):
+        with self._cond:
+            while True:
+                if not self._queue:
+                    self._cond.wait()
+                    continue
+
+                call = self._queue[0][2]
+                now = self.clock()
+                delay = max(
+                    self._blocked_until - now,
+                    call.not_before - now,
+                    self.request_bucket.delay_for(1),
+                    self.token_bucket.delay_for(call.tokens),
+                )
+                if delay > 0:
+                    # Woken early by new submissions, so an interactive call
+                    # arriving now is re-evaluated ahead of queued bulk work
+                    self.wait(self._cond, delay)
+                    continue
+
+                heapq.heappop(self._queue)
+                self.request_bucket.consume(1)
+                self.token_bucket.consume(call.tokens)
+                if call.attempt == 0:
+                    self._waits.setdefault(call.priority, deque(maxlen=500)).append(now - call.enqueued_at)
+                self._in_flight += 1
+                return call
+
+    def _worker(self):
+        while True:
+            call = self._next_call()
+            if call.attempt == 0 and not call.future.set_running_or_notify_cancel():
+                with self._cond:
+                    self._in_flight -= 1
+                continue
+
+            try:
+                result = call.fn(*call.args, **call.kwargs)
+            except Exception as e:
+                self._handle_error(call, e)
+            else:
+                with self._cond:
+                    self._in_flight -= 1
+                    self._counters["completed"] += 1
+                call.future.set_result(result)
+
+    def _handle_error(self, call, error):
+        with self._cond:
+            self._in_flight -= 1
+            if not is_throttled(error) or call.attempt >= self.max_retries:
+                self._counters["failed"] += 1
+                if is_throttled(error):
+                    self._counters["throttled"] += 1
+                call.future.set_exception(error)
+                return
+
+            # Exponential backoff with full jitter; the whole scheduler pauses
+            # so other workers don't keep hitting the exhausted quota
+            self._counters["throttled"] += 1
+            self._counters["retries"] += 1
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** call.attempt))
+            call.attempt += 1
+            now = self.clock()
+            call.not_before = now + delay
+            self._blocked_until = max(self._blocked_until, now + delay)
+            logger.warning(f"LLM throttled (attempt {call.attempt}/{self.max_retries}); retrying in {delay:.2f}s")
+
+            # Retry keeps its original place in line
+            heapq.heappush(self._queue, (call.priority, call.seq, call))
+            self._cond.notify_all()
+
+
+scheduler = LLMScheduler(
+    requests_per_minute=int(os.getenv("LLM_REQUESTS_PER_MINUTE", "60")),
+    tokens_per_minute=int(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000")),
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", "5")),
+    backoff_base=float(os.getenv("LLM_BACKOFF_BASE", "1.0")),
+    backoff_max=float(os.getenv("LLM_BACKOFF_MAX", "32")),
+)
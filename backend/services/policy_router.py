@@ -0,0 +1,181 @@
+import heapq
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+
+from database import db
+from models.clause_model import Clause
+from models.document_model import Document
+
+# How many candidate policies a query is answered against
+TOP_K = int(os.getenv("POLICY_ROUTER_TOP_K", "2"))
+
+STOPWORDS = {
+    "the", "and", "for", "are", "any", "all", "not", "but", "with", "this", "that", "from",
+    "shall", "will", "may", "such", "which", "under", "per", "has", "have", "been", "was",
+    "were", "its", "their", "there", "other", "than", "into", "upon", "within", "each",
+    "policy", "insured", "insurance", "company", "limited", "section", "clause", "page",
+    "year", "old", "months", "month", "days", "can", "does", "who", "what", "how", "male",
+    "female", "also", "more", "less", "only", "including", "include", "includes", "where",
+}
+
+FIELD_WEIGHTS = {"insurer": 3.0, "product": 3.0, "name": 2.0, "sections": 2.0, "keywords": 1.0}
+
+INSURER_PATTERN = re.compile(
+    r"([A-Z][A-Za-z&.]*(?:[ \t]+[A-Z][A-Za-z&.]*){0,5}[ \t]+(?:General[ \t]+|Health[ \t]+|Life[ \t]+)?"
+    r"(?:Insurance|Assurance)[ \t]+(?:Company|Co\.?)(?:[ \t]+(?:Ltd\.?|Limited))?)"
+)
+PRODUCT_PATTERN = re.compile(r"([A-Z][A-Za-z0-9\-]*(?:[ \t]+[A-Z][A-Za-z0-9\-]*){0,5}[ \t]+Policy)\b")
+
+
+# Claim emails (and their attachments) are uploaded alongside policies but are
+# never routing targets
+EMAIL_EXTENSIONS = (".eml", ".msg")
+
+
+def is_email_upload(name):
+    return (name or "").lower().endswith(EMAIL_EXTENSIONS)
+
+
+def tokenize(text):
+    return [t for t in re.findall(r"[a-z]{3,}", (text or "").lower()) if t not in STOPWORDS]
+
+
+# ✅ Compact per-document profile (stored in doc_metadata["profile"])
+def build_profile(name, text, clauses=None, max_keywords=30, max_sections=50):
+    head = (text or "")[:5000]
+
+    insurer_match = INSURER_PATTERN.search(head)
+    product_match = PRODUCT_PATTERN.search(head)
+
+    sections = []
+    for clause in clauses or []:
+        title = (clause.get("title") or "").strip()
+        if title and title not in sections:
+            sections.append(title)
+        if len(sections) >= max_sections:
+            break
+
+    counts = Counter(t for t in tokenize(text) if len(t) >= 4)
+    return {
+        "insurer": re.sub(r"\s+", " ", insurer_match.group(1)).strip() if insurer_match else None,
+        "product": re.sub(r"\s+", " ", product_match.group(1)).strip() if product_match else os.path.splitext(name)[0],
+        "keywords": [term for term, _ in counts.most_common(max_keywords)],
+        "sections": sections,
+    }
+
+
+class PolicyRouter:
+    """
+    In-memory inverted index over document profiles. A query only touches
+    the postings of its own terms, so routing cost depends on the query and
+    not on how many policies are loaded.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = defaultdict(dict)   # term -> {doc_id: weight}
+        self._doc_terms = {}                 # doc_id -> set(terms)
+        self._profiles = {}                  # doc_id -> (name, profile)
+        self._last_seen_id = 0
+
+    def _profile_terms(self, name, profile):
+        weights = defaultdict(float)
+        fields = {
+            "insurer": [profile.get("insurer") or ""],
+            "product": [profile.get("product") or ""],
+            "name": [os.path.splitext(name or "")[0]],
+            "sections": profile.get("sections") or [],
+            "keywords": profile.get("keywords") or [],
+        }
+        for field, values in fields.items():
+            for value in values:
+                for term in set(tokenize(value)):
+                    weights[term] = max(weights[term], FIELD_WEIGHTS[field])
+        return weights
+
+    def add(self, doc_id, name, profile):
+        with self._lock:
+            self._remove_locked(doc_id)
+            weights = self._profile_terms(name, profile)
+            for term, weight in weights.items():
+                self._postings[term][doc_id] = weight
+            self._doc_terms[doc_id] = set(weights)
+            self._profiles[doc_id] = (name, profile)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id):
+        for term in self._doc_terms.pop(doc_id, ()):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._profiles.pop(doc_id, None)
+
+    # ✅ Pick up documents ingested since the last check (e.g. by another worker).
+    #    Only reads stored profiles by primary key, never the extracted text.
+    def refresh(self):
+        rows = (
+            Document.query
+            .with_entities(Document.id, Document.name, Document.parent_id, Document.status, Document.email_id, Document.doc_metadata)
+            .filter(Document.id > self._last_seen_id)
+            .order_by(Document.id)
+            .all()
+        )
+        backfilled = False
+        for doc_id, name, parent_id, status, email_id, metadata in rows:
+            if parent_id:
+                self.remove(parent_id)
+            if status != "superseded" and not email_id and not is_email_upload(name):
+                profile = (metadata or {}).get("profile")
+                if not profile:
+                    profile = self._backfill_profile(doc_id)
+                    backfilled = backfilled or profile is not None
+                if profile:
+                    self.add(doc_id, name, profile)
+            self._last_seen_id = max(self._last_seen_id, doc_id)
+        if backfilled:
+            db.session.commit()
+
+    # ✅ Policies uploaded before routing have no stored profile: build one from
+    #    the stored text and clause titles once, and persist it
+    def _backfill_profile(self, doc_id):
+        doc = Document.query.get(doc_id)
+        if not doc or not doc.extracted_text:
+            return None
+        titles = Clause.query.with_entities(Clause.title).filter_by(document_id=doc_id).order_by(Clause.id)
+        profile = build_profile(doc.name, doc.extracted_text, [{"title": title} for (title,) in titles])
+        doc.doc_metadata = {**(doc.doc_metadata or {}), "profile": profile}
+        return profile
+
+    def route(self, query, top_k=TOP_K):
+        self.refresh()
+        with self._lock:
+            total = max(len(self._profiles), 1)
+            scores = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + total / len(postings))
+                for doc_id, weight in postings.items():
+                    scores[doc_id] += weight * idf
+            ranked = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+            return [
+                {"id": doc_id, "name": self._profiles[doc_id][0], "score": round(score, 3)}
+                for doc_id, score in ranked
+            ]
+
+    def profile(self, doc_id):
+        self.refresh()
+        entry = self._profiles.get(doc_id)
+        return entry[1] if entry else None
+
+
+router = PolicyRouter()
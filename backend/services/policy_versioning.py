@@ -0,0 +1,133 @@
+import hashlib
+import re
+from collections import defaultdict, deque
+from datetime import datetime
+
+from database import db
+from models.clause_model import Clause
+from models.document_model import Document
+
+
+# ✅ Stable content hash (whitespace-insensitive)
+def hash_text(text):
+    normalized = re.sub(r"\s+", " ", text or "").strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+# ✅ Find the document a new upload replaces. Versions are only linked on an
+#    explicit previous_version_id: file names like "policy.pdf" are shared by
+#    unrelated insurers. Returns None if no such document exists.
+def find_predecessor(previous_version_id):
+    return Document.query.get(int(previous_version_id))
+
+
+def _clause_number(clause_id):
+    match = re.search(r"(\d+)$", clause_id or "")
+    return int(match.group(1)) if match else 0
+
+
+# ✅ Diff freshly extracted clauses against the predecessor's stored clauses
+def diff_clauses(old_clauses, new_clauses):
+    """
+    Pair clauses by content hash first, then by title for clauses whose text
+    changed. Returns (unchanged, changed, added, removed) where unchanged and
+    changed are lists of (old Clause row, new clause dict).
+    """
+    by_hash = defaultdict(deque)
+    for old in old_clauses:
+        by_hash[old.content_hash or hash_text(old.content)].append(old)
+
+    unchanged, pending = [], []
+    for new in new_clauses:
+        bucket = by_hash.get(new["hash"])
+        if bucket:
+            unchanged.append((bucket.popleft(), new))
+        else:
+            pending.append(new)
+
+    by_title = defaultdict(deque)
+    for bucket in by_hash.values():
+        for old in bucket:
+            by_title[(old.title or "").strip().lower()].append(old)
+
+    changed, added = [], []
+    for new in pending:
+        bucket = by_title.get((new.get("title") or "").strip().lower())
+        if bucket:
+            changed.append((bucket.popleft(), new))
+        else:
+            added.append(new)
+
+    removed = [old for bucket in by_title.values() for old in bucket]
+    return unchanged, changed, added, removed
+
+
+def _clause_row(document_id, clause_id, clause, **overrides):
+    fields = dict(
+        clause_id=clause_id,
+        document_id=document_id,
+        content=clause.get("text"),
+        title=clause.get("title"),
+        category=clause.get("category"),
+        page_number=clause.get("page"),
+        relevance_keywords=clause.get("keywords", []),
+        content_hash=clause["hash"],
+        created_at=datetime.utcnow(),
+    )
+    fields.update(overrides)
+    return Clause(**fields)
+
+
+# ✅ Store a new version's clauses with ids that are stable across the policy
+#    lineage. The predecessor keeps its own rows, so clause references and
+#    queries against older versions still resolve.
+def sync_clauses(document_id, clauses, predecessor=None):
+    for clause in clauses:
+        clause["hash"] = hash_text(clause.get("text"))
+
+    old_clauses = Clause.query.filter_by(document_id=predecessor.id).all() if predecessor else []
+    unchanged, changed, added, removed = diff_clauses(old_clauses, clauses)
+
+    # Unchanged and reworded clauses keep the id they had in the previous version
+    for old, new in unchanged:
+        db.session.add(_clause_row(
+            document_id, old.clause_id, new,
+            # Keep stored enrichment unless it predates enrichment
+            relevance_keywords=old.relevance_keywords or new.get("keywords", []),
+            category=old.category if old.category is not None else new.get("category"),
+        ))
+    for old, new in changed:
+        db.session.add(_clause_row(document_id, old.clause_id, new))
+
+    # Clauses added by a revision are numbered after every id in the previous
+    # version, so an id retired here is never handed to different wording
+    next_number = max((_clause_number(old.clause_id) for old in old_clauses), default=0) + 1
+    for new in added:
+        clause_id = new.get("clause_id")
+        if predecessor or not clause_id:
+            clause_id = f"C{next_number:03}"
+            next_number += 1
+        db.session.add(_clause_row(document_id, clause_id, new))
+
+    if predecessor:
+        predecessor.status = "superseded"
+
+    db.session.commit()
+
+    return {
+        "added": len(added),
+        "removed": len(removed),
+        "changed": len(changed),
+        "unchanged": len(unchanged),
+    }
+
+
+# ✅ Version chain for a document, oldest first
+def get_version_history(doc):
+    chain = []
+    seen = set()
+    while doc and doc.id not in seen:
+        seen.add(doc.id)
+        chain.append(doc)
+        doc = Document.query.get(doc.parent_id) if doc.parent_id else None
+    return list(reversed(chain))
@@ -0,0 +1,201 @@
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+
+# ───────────────────────────────
+# Opt-in per-request profiling. With neither PROFILE_TOKEN nor
+# PROFILE_SAMPLE_RATE set, nothing is installed and requests are untouched.
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")                         # send as X-Profile-Token
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # 0.0 - 1.0
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+PROFILE_PATHS = tuple(p for p in os.getenv("PROFILE_PATHS", "/api/query,/api/upload").split(",") if p)
+TOP_FUNCTIONS = 10
+
+PROFILE_HEADER = "HTTP_X_PROFILE_TOKEN"
+
+_write_lock = threading.Lock()
+# One profiled request at a time: cProfile can't nest on Python 3.12+, and
+# overlapping profiles would be hard to read anyway
+_profile_lock = threading.Lock()
+
+
+def profiling_enabled():
+    return bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+
+def token_matches(token):
+    return bool(PROFILE_TOKEN) and bool(token) and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+def _func_name(func):
+    filename, line, name = func
+    return f"{os.path.basename(filename)}:{line}({name})" if line else name
+
+
+# ✅ Collapsed stacks ("a;b;c <microseconds>") for flamegraph tools, rebuilt
+#    from cProfile's caller graph: each path gets its share of the callee's
+#    time in proportion to the edge's cumulative time.
+def collapsed_stacks(stats, max_depth=64):
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    lines = {}
+
+    def walk(func, path, fraction, depth):
+        _, _, self_time, cumulative, _ = stats.stats[func]
+        path = path + [_func_name(func)]
+        weight = int(self_time * fraction * 1_000_000)
+        if weight:
+            key = ";".join(path)
+            lines[key] = lines.get(key, 0) + weight
+        # Stop at the depth limit or once a path's share drops below 1µs
+        if depth >= max_depth or cumulative * fraction < 1e-6:
+            return
+        for child, edge_time in callees.get(func, []):
+            if _func_name(child) in path:
+                continue  # recursion
+            walk(child, path, fraction * edge_time / stats.stats[child][3] if stats.stats[child][3] else 0, depth + 1)
+
+    roots = [func for func, (_, _, _, _, callers) in stats.stats.items() if not callers]
+    for root in roots:
+        walk(root, [], 1.0, 0)
+    return [f"{stack} {weight}" for stack, weight in sorted(lines.items())]
+
+
+def _top_functions(stats, field, limit=TOP_FUNCTIONS):
+    # field 2 = self time, 3 = cumulative time
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][field], reverse=True)[:limit]
+    return [
+        {
+            "function": _func_name(func),
+            "calls": nc,
+            "selfMs": round(tt * 1000, 2),
+            "cumulativeMs": round(ct * 1000, 2),
+        }
+        for func, (_, nc, tt, ct, _) in rows
+    ]
+
+
+def _rotate():
+    summaries = sorted(f for f in os.listdir(PROFILE_DIR) if f.endswith(".json"))
+    for old in summaries[:max(0, len(summaries) - PROFILE_KEEP)]:
+        profile_id = old[:-len(".json")]
+        for ext in (".json", ".prof", ".collapsed"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, profile_id + ext))
+            except FileNotFoundError:
+                pass
+
+
+def _save(profiler, environ, status, duration):
+    stats = pstats.Stats(profiler)
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", environ.get("PATH_INFO", "")).strip("-")
+    profile_id = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{slug}-{uuid.uuid4().hex[:6]}"
+    base = os.path.join(PROFILE_DIR, profile_id)
+
+    summary = {
+        "id": profile_id,
+        "method": environ.get("REQUEST_METHOD"),
+        "path": environ.get("PATH_INFO"),
+        "status": status,
+        "durationMs": round(duration * 1000, 2),
+        "timestamp": datetime.utcnow().isoformat(),
+        "topSelf": _top_functions(stats, 2),
+        "topCumulative": _top_functions(stats, 3),
+    }
+
+    with _write_lock:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stats.dump_stats(base + ".prof")
+        with open(base + ".collapsed", "w", encoding="utf-8") as f:
+            f.write("\n".join(collapsed_stacks(stats)) + "\n")
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(summary, f)
+        _rotate()
+
+
+# ✅ Summaries of recent profiles, newest first
+def list_profiles(limit=PROFILE_KEEP):
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    out = []
+    for name in sorted((f for f in os.listdir(PROFILE_DIR) if f.endswith(".json")), reverse=True)[:limit]:
+        try:
+            with open(os.path.join(PROFILE_DIR, name), encoding="utf-8") as f:
+                out.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return out
+
+
+class ProfilingMiddleware:
+    """
+    WSGI wrapper that profiles a request when it carries a valid
+    X-Profile-Token header or is picked by PROFILE_SAMPLE_RATE. Only the
+    request thread is profiled; time spent waiting on LLM scheduler or
+    attachment worker threads shows up as waits on their futures.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _should_profile(self, environ):
+        if not environ.get("PATH_INFO", "").startswith(PROFILE_PATHS):
+            return False
+        if token_matches(environ.get(PROFILE_HEADER)):
+            return True
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    def __call__(self, environ, start_response):
+        if not self._should_profile(environ) or not _profile_lock.acquire(blocking=False):
+            return self.app(environ, start_response)
+        try:
+            return self._profiled(environ, start_response)
+        finally:
+            _profile_lock.release()
+
+    def _profiled(self, environ, start_response):
+        status_holder = {}
+
+        def capture_status(status, headers, exc_info=None):
+            status_holder["status"] = int(status.split(" ", 1)[0])
+            return start_response(status, headers, exc_info)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            # Materialise the body so response generation is inside the profile
+            app_iter = self.app(environ, capture_status)
+            try:
+                body = list(app_iter)
+            finally:
+                if hasattr(app_iter, "close"):
+                    app_iter.close()
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - started
+            try:
+                _save(profiler, environ, status_holder.get("status"), duration)
+            except Exception as e:
+                print(f"⚠️ Could not save profile for {environ.get('PATH_INFO')}: {e}")
+        return body
+
+
+# ✅ Install the middleware only when profiling is configured
+def init_profiling(app):
+    if not profiling_enabled():
+        return False
+    app.wsgi_app = ProfilingMiddleware(app.wsgi_app)
+    return True
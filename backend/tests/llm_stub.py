@@ -0,0 +1,36 @@
+"""Local stand-in for a Gemini model that throttles like the real API."""
+import threading
+
+
+class ResourceExhausted(Exception):
+    """Same name and code as google.api_core.exceptions.ResourceExhausted."""
+    code = 429
+
+
+class StubUsage:
+    def __init__(self, total_token_count):
+        self.total_token_count = total_token_count
+
+
+class StubResponse:
+    def __init__(self, text, total_tokens=100):
+        self.text = text
+        self.usage_metadata = StubUsage(total_tokens)
+
+
+class ThrottlingModel:
+    """`generate_content` raises a 429 for the first `failures` calls, then answers."""
+
+    def __init__(self, failures=0, text="**Claim:** APPROVED"):
+        self.failures = failures
+        self.text = text
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self._lock:
+            self.calls += 1
+            throttled = self.calls <= self.failures
+        if throttled:
+            raise ResourceExhausted("429 Resource has been exhausted (e.g. check quota).")
+        return StubResponse(self.text)
@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+
+from services.llm_scheduler import BULK, INTERACTIVE, LLMScheduler
+from tests.llm_stub import ResourceExhausted, ThrottlingModel
+
+TIMEOUT = 5  # real seconds; every scheduler pause runs on the fake clock
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.waits = []
+
+    def __call__(self):
+        return self.now
+
+    def wait(self, condition, seconds):
+        self.waits.append(seconds)
+        self.now += seconds
+
+
+def make_scheduler(clock, **kwargs):
+    return LLMScheduler(clock=clock, wait=clock.wait, **kwargs)
+
+
+def test_throttled_calls_are_retried_with_backoff():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, max_concurrency=1, max_retries=5, backoff_base=1.0, backoff_max=8.0)
+    model = ThrottlingModel(failures=3)
+
+    response = scheduler.submit(model.generate_content, "prompt").result(TIMEOUT)
+
+    assert response.text == "**Claim:** APPROVED"
+    assert model.calls == 4
+    metrics = scheduler.metrics()
+    assert metrics["retries"] == 3
+    assert metrics["throttled"] == 3
+    assert metrics["completed"] == 1
+    # Full jitter: each pause is at most base * 2^attempt
+    assert all(0 <= w <= 4.0 for w in clock.waits)
+    assert clock.now <= 1.0 + 2.0 + 4.0
+
+
+def test_gives_up_after_max_retries():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, max_concurrency=1, max_retries=2)
+    model = ThrottlingModel(failures=10)
+
+    with pytest.raises(ResourceExhausted):
+        scheduler.submit(model.generate_content, "prompt").result(TIMEOUT)
+
+    assert model.calls == 3
+    assert scheduler.metrics()["failed"] == 1
+
+
+def test_other_errors_are_not_retried():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, max_concurrency=1)
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise ValueError("document 4291 not found")
+
+    with pytest.raises(ValueError):
+        scheduler.submit(fail).result(TIMEOUT)
+
+    assert len(calls) == 1
+    assert scheduler.metrics()["retries"] == 0
+    assert clock.waits == []
+
+
+def test_request_rate_is_limited():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, max_concurrency=1, requests_per_minute=2)
+    model = ThrottlingModel()
+
+    for _ in range(3):
+        scheduler.submit(model.generate_content, "prompt").result(TIMEOUT)
+
+    # The third request waits for one refill (60s / 2 requests)
+    assert clock.now == pytest.approx(30.0)
+
+
+def test_interactive_calls_are_served_before_queued_bulk():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, max_concurrency=1)
+    order = []
+    gate = threading.Event()
+
+    # Occupy the only worker so everything below queues up
+    blocker = scheduler.submit(gate.wait, TIMEOUT, priority=BULK)
+    bulk = [scheduler.submit(order.append, f"bulk-{i}", priority=BULK) for i in range(3)]
+    interactive = scheduler.submit(order.append, "interactive", priority=INTERACTIVE)
+    gate.set()
+
+    for future in [blocker, *bulk, interactive]:
+        future.result(TIMEOUT)
+    assert order == ["interactive", "bulk-0", "bulk-1", "bulk-2"]
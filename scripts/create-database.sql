@@ -10,6 +10,10 @@ CREATE TABLE IF NOT EXISTS documents (
     status VARCHAR(50) DEFAULT 'processing',
     extracted_text TEXT,
     metadata JSONB,
+    content_hash VARCHAR(64),
+    parent_id INTEGER REFERENCES documents(id),
+    version INTEGER DEFAULT 1,
+    email_id INTEGER REFERENCES documents(id),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -33,14 +37,26 @@ CREATE TABLE IF NOT EXISTS decisions (
 -- Clauses table for policy rules
 CREATE TABLE IF NOT EXISTS clauses (
     id SERIAL PRIMARY KEY,
-    clause_id VARCHAR(20) UNIQUE NOT NULL,
+    clause_id VARCHAR(20) NOT NULL,
     document_id INTEGER REFERENCES documents(id),
     title VARCHAR(255),
     content TEXT NOT NULL,
     category VARCHAR(100),
     page_number INTEGER,
     relevance_keywords TEXT[],
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    content_hash VARCHAR(64),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (document_id, clause_id)
+);
+
+-- Per-page extracted text (page ranges for the document viewer)
+CREATE TABLE IF NOT EXISTS document_pages (
+    id SERIAL PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents(id),
+    page_number INTEGER NOT NULL,
+    content TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (document_id, page_number)
 );
 
 -- Audit trail table
@@ -60,6 +76,9 @@ CREATE INDEX IF NOT EXISTS idx_decisions_decision ON decisions(decision);
 CREATE INDEX IF NOT EXISTS idx_decisions_created_at ON decisions(created_at);
 CREATE INDEX IF NOT EXISTS idx_clauses_clause_id ON clauses(clause_id);
 CREATE INDEX IF NOT EXISTS idx_clauses_category ON clauses(category);
+CREATE INDEX IF NOT EXISTS idx_clauses_content_hash ON clauses(content_hash);
+CREATE INDEX IF NOT EXISTS idx_documents_parent_id ON documents(parent_id);
+CREATE INDEX IF NOT EXISTS idx_document_pages_document_id ON document_pages(document_id);
 CREATE INDEX IF NOT EXISTS idx_audit_trail_decision_id ON audit_trail(decision_id);
 CREATE INDEX IF NOT EXISTS idx_audit_trail_timestamp ON audit_trail(timestamp);
 
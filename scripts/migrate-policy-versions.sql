@@ -0,0 +1,19 @@
+-- Upgrade a database created before policy versioning.
+-- CREATE TABLE IF NOT EXISTS in create-database.sql never alters existing tables,
+-- so run this first, then create-database.sql for the new tables and indexes.
+
+-- Documents: version chain, content hash, parent email of attachments
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS parent_id INTEGER REFERENCES documents(id);
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS version INTEGER DEFAULT 1;
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS email_id INTEGER REFERENCES documents(id);
+UPDATE documents SET version = 1 WHERE version IS NULL;
+
+-- Clauses: ids are unique per document, not globally
+ALTER TABLE clauses ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+ALTER TABLE clauses DROP CONSTRAINT IF EXISTS clauses_clause_id_key;
+ALTER TABLE clauses DROP CONSTRAINT IF EXISTS clauses_document_id_clause_id_key;
+ALTER TABLE clauses ADD CONSTRAINT clauses_document_id_clause_id_key UNIQUE (document_id, clause_id);
+
+CREATE INDEX IF NOT EXISTS idx_clauses_content_hash ON clauses(content_hash);
+CREATE INDEX IF NOT EXISTS idx_documents_parent_id ON documents(parent_id);